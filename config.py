@@ -6,68 +6,142 @@ All settings are loaded from environment variables.
 import os
 import json
 import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional, Tuple
 from dotenv import load_dotenv
 
 # Load .env from the posting_service directory first, then parent
 SERVICE_DIR = Path(__file__).parent
 PROJECT_DIR = SERVICE_DIR.parent
 
-# Try service-level .env first, fallback to project-level
-env_path = SERVICE_DIR / ".env"
-if not env_path.exists():
-    env_path = PROJECT_DIR / ".env"
-load_dotenv(env_path)
 
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() == "true"
 
-class Config:
+
+def _parse_json_env(raw: str) -> Optional[dict]:
+    """Parse a JSON-valued env var; None if empty or malformed."""
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+def _parse_hm(name: str, value: str) -> Tuple[int, int]:
+    """Parse an HH:MM schedule time; raises ValueError if malformed."""
+    try:
+        hour, minute = (int(part) for part in value.split(":"))
+    except ValueError:
+        raise ValueError(f"{name} must be HH:MM, got {value!r}") from None
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"{name} is not a valid time of day: {value!r}")
+    return hour, minute
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
     """Centralized configuration from environment variables."""
 
-    # Meta API
-    META_ACCESS_TOKEN = os.getenv("META_ACCESS_TOKEN", "")
-    IG_ACCOUNT_ID = os.getenv("IG_ACCOUNT_ID", "")
-    FB_PAGE_ID = os.getenv("FB_PAGE_ID", "")
+    # Meta API (secrets are kept out of the repr so they can't leak into logs)
+    META_ACCESS_TOKEN: str = field(repr=False)
+    IG_ACCOUNT_ID: str
+    FB_PAGE_ID: str
 
     # Platform toggles
-    IG_ENABLED = os.getenv("IG_ENABLED", "true").lower() == "true"
-    IG_POST_REEL = os.getenv("IG_POST_REEL", "true").lower() == "true"
-    IG_POST_STORY = os.getenv("IG_POST_STORY", "true").lower() == "true"
+    IG_ENABLED: bool
+    IG_POST_REEL: bool
+    IG_POST_STORY: bool
 
-    FB_ENABLED = os.getenv("FB_ENABLED", "true").lower() == "true"
-    FB_POST_REEL = os.getenv("FB_POST_REEL", "true").lower() == "true"
-    FB_POST_FEED = os.getenv("FB_POST_FEED", "true").lower() == "true"
+    FB_ENABLED: bool
+    FB_POST_REEL: bool
+    FB_POST_FEED: bool
 
     # GCS
-    GCS_ENABLED = os.getenv("GCS_ENABLED", "false").lower() == "true"
-    GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME", "")
-    GCS_CREDENTIALS_JSON = os.getenv("GCS_CREDENTIALS_JSON", "")
-    GCS_FOLDER_PREFIX = os.getenv("GCS_FOLDER_PREFIX", "reels")
+    GCS_ENABLED: bool
+    GCS_BUCKET_NAME: str
+    GCS_CREDENTIALS_JSON: str = field(repr=False)
+    GCS_CREDENTIALS: Optional[dict] = field(repr=False)  # GCS_CREDENTIALS_JSON, parsed once
+    GCS_FOLDER_PREFIX: str
 
-    # Folders (prefer SERVICE_DIR since it's a standalone repo now)
-    INPUT_FOLDER = SERVICE_DIR / os.getenv("INPUT_FOLDER", "input")
-    PROCESSED_FOLDER = SERVICE_DIR / os.getenv("PROCESSED_FOLDER", "processed")
+    # Folders
+    INPUT_FOLDER: Path
+    PROCESSED_FOLDER: Path
 
     # Schedule (IST times as HH:MM)
-    SCHEDULE_TIME_1 = os.getenv("SCHEDULE_TIME_1", "18:00")  # 6 PM IST
-    SCHEDULE_TIME_2 = os.getenv("SCHEDULE_TIME_2", "20:00")  # 8 PM IST
+    SCHEDULE_TIME_1: str
+    SCHEDULE_TIME_2: str
+    SCHEDULE_HM_1: Tuple[int, int]  # SCHEDULE_TIME_1 as (hour, minute)
+    SCHEDULE_HM_2: Tuple[int, int]
 
     # Database
-    DB_PATH = SERVICE_DIR / os.getenv("DB_NAME", "posting_service.db")
+    DB_PATH: Path
 
     # Logging
-    LOG_DIR = SERVICE_DIR / "logs"
-    LOG_FILE = LOG_DIR / "posting_service.log"
+    LOG_DIR: Path
+    LOG_FILE: Path
 
-    @classmethod
-    def validate(cls):
+    def validate(self):
         """Validate required config values are set."""
         issues = []
-        if not cls.META_ACCESS_TOKEN or len(cls.META_ACCESS_TOKEN) < 50:
+        if not self.META_ACCESS_TOKEN or len(self.META_ACCESS_TOKEN) < 50:
             issues.append("META_ACCESS_TOKEN is missing or too short")
-        if not cls.IG_ACCOUNT_ID:
+        if not self.IG_ACCOUNT_ID:
             issues.append("IG_ACCOUNT_ID is missing")
-        if not cls.FB_PAGE_ID:
+        if not self.FB_PAGE_ID:
             issues.append("FB_PAGE_ID is missing")
-        if cls.GCS_ENABLED and not cls.GCS_CREDENTIALS_JSON:
+        if self.GCS_ENABLED and not self.GCS_CREDENTIALS_JSON:
             issues.append("GCS_CREDENTIALS_JSON is missing but GCS_ENABLED=true")
+        elif self.GCS_ENABLED and self.GCS_CREDENTIALS is None:
+            issues.append("GCS_CREDENTIALS_JSON is not valid JSON")
         return issues
+
+
+@lru_cache(maxsize=1)
+def get_config() -> Settings:
+    """Load .env once and build the immutable settings object."""
+    # Try service-level .env first, fallback to project-level
+    env_path = SERVICE_DIR / ".env"
+    if not env_path.exists():
+        env_path = PROJECT_DIR / ".env"
+    load_dotenv(env_path)
+
+    log_dir = SERVICE_DIR / "logs"
+    gcs_credentials_json = os.getenv("GCS_CREDENTIALS_JSON", "")
+    schedule_time_1 = os.getenv("SCHEDULE_TIME_1", "18:00")  # 6 PM IST
+    schedule_time_2 = os.getenv("SCHEDULE_TIME_2", "20:00")  # 8 PM IST
+
+    return Settings(
+        META_ACCESS_TOKEN=os.getenv("META_ACCESS_TOKEN", ""),
+        IG_ACCOUNT_ID=os.getenv("IG_ACCOUNT_ID", ""),
+        FB_PAGE_ID=os.getenv("FB_PAGE_ID", ""),
+        IG_ENABLED=_env_bool("IG_ENABLED", "true"),
+        IG_POST_REEL=_env_bool("IG_POST_REEL", "true"),
+        IG_POST_STORY=_env_bool("IG_POST_STORY", "true"),
+        FB_ENABLED=_env_bool("FB_ENABLED", "true"),
+        FB_POST_REEL=_env_bool("FB_POST_REEL", "true"),
+        FB_POST_FEED=_env_bool("FB_POST_FEED", "true"),
+        GCS_ENABLED=_env_bool("GCS_ENABLED", "false"),
+        GCS_BUCKET_NAME=os.getenv("GCS_BUCKET_NAME", ""),
+        GCS_CREDENTIALS_JSON=gcs_credentials_json,
+        GCS_CREDENTIALS=_parse_json_env(gcs_credentials_json),
+        GCS_FOLDER_PREFIX=os.getenv("GCS_FOLDER_PREFIX", "reels"),
+        # Folders (prefer SERVICE_DIR since it's a standalone repo now)
+        INPUT_FOLDER=SERVICE_DIR / os.getenv("INPUT_FOLDER", "input"),
+        PROCESSED_FOLDER=SERVICE_DIR / os.getenv("PROCESSED_FOLDER", "processed"),
+        SCHEDULE_TIME_1=schedule_time_1,
+        SCHEDULE_TIME_2=schedule_time_2,
+        SCHEDULE_HM_1=_parse_hm("SCHEDULE_TIME_1", schedule_time_1),
+        SCHEDULE_HM_2=_parse_hm("SCHEDULE_TIME_2", schedule_time_2),
+        DB_PATH=SERVICE_DIR / os.getenv("DB_NAME", "posting_service.db"),
+        LOG_DIR=log_dir,
+        LOG_FILE=log_dir / "posting_service.log",
+    )
+
+
+# Module-level instance so existing `from .config import Config` call sites
+# keep working with attribute access (Config.IG_ENABLED, Config.validate()).
+Config = get_config()
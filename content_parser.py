@@ -4,14 +4,20 @@ Parses social_media_content.json (primary) or social_media_content.txt (fallback
 to extract title, description, and hashtags for each platform.
 """
 
-import json
 import re
 import logging
 from pathlib import Path
 from typing import Dict, Optional
+import orjson
 
 logger = logging.getLogger(__name__)
 
+_SECTION_START_MARKERS = ("INSTAGRAM", "📱")
+_SECTION_END_MARKERS = ("YOUTUBE", "🎬", "======")
+
+_DESC_RE = re.compile(r"Description:\s*\n(.+?)(?=\nHashtags:|\n\n\n|\Z)", re.DOTALL)
+_HASH_RE = re.compile(r"Hashtags:\s*\n(.+?)(?:\n\n|\Z)", re.DOTALL)
+
 
 def parse_content_folder(folder_path: Path) -> Dict[str, str]:
     """
@@ -43,7 +49,7 @@ def parse_content_folder(folder_path: Path) -> Dict[str, str]:
     
     # If nothing found, return empty
     if content is None:
-        logger.warning(f"No content files found in {folder_path.name}")
+        logger.warning("No content files found in %s", folder_path.name)
         return {
             "title": "",
             "description": "",
@@ -62,8 +68,7 @@ def parse_content_folder(folder_path: Path) -> Dict[str, str]:
 def _parse_json(json_path: Path) -> Optional[Dict[str, str]]:
     """Parse social_media_content.json file."""
     try:
-        with open(json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = orjson.loads(json_path.read_bytes())
         
         # Use instagram_facebook section
         ig_fb = data.get("instagram_facebook", {})
@@ -72,76 +77,94 @@ def _parse_json(json_path: Path) -> Optional[Dict[str, str]]:
         description = ig_fb.get("description", "").strip()
         hashtags_list = ig_fb.get("hashtags", [])
         
-        # Format hashtags with # prefix
-        hashtags = " ".join(
-            f"#{tag}" if not tag.startswith("#") else tag
-            for tag in hashtags_list
-        )
+        # Format hashtags with # prefix (empty tags are dropped)
+        tags = [tag for tag in hashtags_list if tag]
+        if any(tag.startswith("#") for tag in tags):
+            hashtags = " ".join(tag if tag.startswith("#") else f"#{tag}" for tag in tags)
+        else:
+            # Common case: no tag carries its own '#'
+            hashtags = "#" + " #".join(tags) if tags else ""
         
-        logger.info(f"Parsed JSON content: title='{title[:50]}...', {len(hashtags_list)} hashtags")
+        logger.info("Parsed JSON content: title='%s...', %d hashtags", title[:50], len(hashtags_list))
         return {"title": title, "description": description, "hashtags": hashtags}
     
     except Exception as e:
-        logger.error(f"Failed to parse JSON {json_path}: {e}")
+        logger.error("Failed to parse JSON %s: %s", json_path, e)
         return None
 
 
 def _parse_txt(txt_path: Path) -> Optional[Dict[str, str]]:
     """Parse social_media_content.txt file (fallback)."""
     try:
-        with open(txt_path, "r", encoding="utf-8") as f:
-            content = f.read()
+        content = txt_path.read_text(encoding="utf-8")
         
-        title = ""
         description = ""
         hashtags = ""
         
         # Extract Instagram/Facebook section
-        ig_section = ""
         if "INSTAGRAM / FACEBOOK" in content or "📱" in content:
-            # Find the IG/FB section
-            lines = content.split("\n")
-            in_section = False
-            section_lines = []
-            
-            for line in lines:
-                if "INSTAGRAM" in line or "📱" in line:
-                    in_section = True
-                    continue
-                if in_section and ("YOUTUBE" in line or "🎬" in line or "======" in line):
-                    break
-                if in_section:
-                    section_lines.append(line)
-            
-            ig_section = "\n".join(section_lines)
+            ig_section = _slice_section(content)
         else:
             ig_section = content
         
         # Parse Title
-        title_match = re.search(r"Title:\s*(.+?)(?:\n|$)", ig_section)
-        if title_match:
-            title = title_match.group(1).strip()
+        title = _find_line_value(ig_section, "Title:")
         
         # Parse Description
-        desc_match = re.search(
-            r"Description:\s*\n(.+?)(?=\nHashtags:|\n\n\n|\Z)", ig_section, re.DOTALL
-        )
+        desc_match = _DESC_RE.search(ig_section)
         if desc_match:
             description = desc_match.group(1).strip()
         
         # Parse Hashtags
-        hash_match = re.search(r"Hashtags:\s*\n(.+?)(?:\n\n|\Z)", ig_section, re.DOTALL)
+        hash_match = _HASH_RE.search(ig_section)
         if hash_match:
             hashtags = hash_match.group(1).strip()
         
-        logger.info(f"Parsed TXT content: title='{title[:50]}...'")
+        logger.info("Parsed TXT content: title='%s...'", title[:50])
         return {"title": title, "description": description, "hashtags": hashtags}
     
     except Exception as e:
-        logger.error(f"Failed to parse TXT {txt_path}: {e}")
+        logger.error("Failed to parse TXT %s: %s", txt_path, e)
         return None
 
 
+def _find_first(text: str, markers, start: int = 0) -> int:
+    """Return the lowest index of any marker in text[start:], or -1."""
+    hits = [i for i in (text.find(m, start) for m in markers) if i >= 0]
+    return min(hits) if hits else -1
+
+
+def _slice_section(content: str) -> str:
+    """
+    Return the lines after the first INSTAGRAM/📱 header line, up to (not
+    including) the next line containing YOUTUBE, 🎬 or ======.
+    """
+    header = _find_first(content, _SECTION_START_MARKERS)
+    if header < 0:
+        return ""
+    start = content.find("\n", header)
+    if start < 0:
+        return ""
+    start += 1
+
+    end = _find_first(content, _SECTION_END_MARKERS, start)
+    if end < 0:
+        return content[start:]
+    # Cut at the start of the line holding the end marker
+    line_start = content.rfind("\n", start, end)
+    return content[start:line_start] if line_start >= 0 else ""
+
+
+def _find_line_value(section: str, key: str) -> str:
+    """Return the text following `key` (skipping whitespace) up to end of line."""
+    pos = section.find(key)
+    if pos < 0:
+        return ""
+    rest = section[pos + len(key):].lstrip()
+    newline = rest.find("\n")
+    return (rest if newline < 0 else rest[:newline]).strip()
+
+
 def _build_reel_caption(content: Dict[str, str]) -> str:
     """
     Build full caption for reels and feed posts.
@@ -2,9 +2,12 @@
 SQLite database for tracking post state and scheduler runs.
 """
 
+import os
+import atexit
 import sqlite3
 import logging
-from pathlib import Path
+import threading
+from contextlib import contextmanager
 from datetime import datetime, date
 
 from .config import Config
@@ -12,224 +15,323 @@ from .config import Config
 logger = logging.getLogger(__name__)
 
 
+def _file_exists(path: str) -> bool:
+    """
+    True if `path` exists. Only a missing file or parent counts as missing;
+    other errors (EIO, EACCES, EMFILE...) propagate rather than being taken
+    as proof the video is gone.
+    """
+    try:
+        os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+    return True
+
+
 class Database:
     """SQLite database manager for tracking post status."""
 
     def __init__(self):
         self.db_path = Config.DB_PATH
+        self._lock = threading.RLock()
+
+        # A single connection is opened once and shared by every method.
+        # check_same_thread=False because APScheduler runs jobs on worker
+        # threads; access is serialized through self._lock instead.
+        # isolation_level=None puts sqlite3 in autocommit mode.
+        self._conn = sqlite3.connect(
+            self.db_path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        # WAL: readers don't block the writer and commits don't fsync the
+        # main DB file; synchronous=NORMAL is durable enough under WAL.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._conn.execute("PRAGMA cache_size=-8000")  # ~8 MB page cache
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        atexit.register(self.close)
+
         self._init_db()
 
+    @contextmanager
     def _get_conn(self):
-        return sqlite3.connect(self.db_path, detect_types=sqlite3.PARSE_DECLTYPES)
+        """Yield the shared connection while holding the database lock."""
+        with self._lock:
+            yield self._conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run the enclosed statements (including calls to other Database
+        methods from the same thread) in one explicit transaction.
+        Not reentrant.
+        """
+        with self._get_conn() as conn:
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def checkpoint(self):
+        """Fold the WAL back into the main database file and truncate it."""
+        with self._get_conn() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        """Close the shared connection (also registered with atexit)."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
 
     def _init_db(self):
         """Initialize database schema."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS posts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                folder_name TEXT UNIQUE NOT NULL,
-                video_path TEXT NOT NULL,
-                title TEXT,
-                description TEXT,
-                hashtags TEXT,
-                reel_caption TEXT,
-                story_caption TEXT,
-                duration REAL,
-                created_at TEXT DEFAULT (datetime('now'))
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS post_status (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                post_id INTEGER NOT NULL,
-                platform TEXT NOT NULL,
-                status TEXT NOT NULL,
-                published_at TEXT,
-                error_message TEXT,
-                FOREIGN KEY (post_id) REFERENCES posts(id),
-                UNIQUE(post_id, platform)
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS scheduler_state (
-                id INTEGER PRIMARY KEY CHECK (id = 1),
-                last_run TEXT,
-                last_posted_folder TEXT,
-                posts_today INTEGER DEFAULT 0,
-                today_date TEXT
-            )
-        """)
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
 
-        # Initialize scheduler state if not exists
-        cursor.execute("INSERT OR IGNORE INTO scheduler_state (id) VALUES (1)")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS posts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    folder_name TEXT UNIQUE NOT NULL,
+                    video_path TEXT NOT NULL,
+                    title TEXT,
+                    description TEXT,
+                    hashtags TEXT,
+                    reel_caption TEXT,
+                    story_caption TEXT,
+                    duration REAL,
+                    created_at TEXT DEFAULT (datetime('now')),
+                    gcs_blob TEXT
+                )
+            """)
 
-        conn.commit()
-        conn.close()
-        logger.info(f"Database initialized: {self.db_path}")
+            # Databases created before gcs_blob existed
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(posts)")}
+            if "gcs_blob" not in columns:
+                cursor.execute("ALTER TABLE posts ADD COLUMN gcs_blob TEXT")
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS post_status (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    post_id INTEGER NOT NULL,
+                    platform TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    published_at TEXT,
+                    error_message TEXT,
+                    FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE,
+                    UNIQUE(post_id, platform)
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS scheduler_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    last_run TEXT,
+                    last_posted_folder TEXT,
+                    posts_today INTEGER DEFAULT 0,
+                    today_date TEXT
+                )
+            """)
+
+            # duration_cache is no longer used; drop it from existing databases
+            cursor.execute("DROP TABLE IF EXISTS duration_cache")
+
+            # Small key/value store for service bookkeeping
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS service_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_created ON posts(created_at)")
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_status_post_pub
+                ON post_status(post_id, platform) WHERE status = 'PUBLISHED'
+            """)
+
+            # Initialize scheduler state if not exists
+            cursor.execute("INSERT OR IGNORE INTO scheduler_state (id) VALUES (1)")
+
+        logger.info("Database initialized: %s", self.db_path)
 
     def add_post(self, folder_name, video_path, content: dict, duration: float):
         """Add a new post entry to the database."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
-                """INSERT OR IGNORE INTO posts 
-                   (folder_name, video_path, title, description, hashtags, reel_caption, story_caption, duration) 
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    folder_name,
-                    str(video_path),
-                    content.get("title", ""),
-                    content.get("description", ""),
-                    content.get("hashtags", ""),
-                    content.get("reel_caption", ""),
-                    content.get("story_caption", ""),
-                    duration,
-                ),
-            )
-            post_id = cursor.lastrowid
-            conn.commit()
-            return post_id
-        except Exception as e:
-            logger.error(f"Error adding post: {e}")
-            return None
-        finally:
-            conn.close()
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    """INSERT OR IGNORE INTO posts 
+                       (folder_name, video_path, title, description, hashtags, reel_caption, story_caption, duration) 
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (
+                        folder_name,
+                        str(video_path),
+                        content.get("title", ""),
+                        content.get("description", ""),
+                        content.get("hashtags", ""),
+                        content.get("reel_caption", ""),
+                        content.get("story_caption", ""),
+                        duration,
+                    ),
+                )
+                # lastrowid is connection-wide; an ignored insert leaves it stale
+                return cursor.lastrowid if cursor.rowcount else None
+            except Exception as e:
+                logger.error("Error adding post: %s", e)
+                return None
 
     def get_post_id(self, folder_name: str):
         """Get post ID by folder name."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM posts WHERE folder_name = ?", (folder_name,))
-        result = cursor.fetchone()
-        conn.close()
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM posts WHERE folder_name = ?", (folder_name,))
+            result = cursor.fetchone()
         return result[0] if result else None
 
+    def get_all_folder_names(self) -> set:
+        """Get the folder names of every post in one query."""
+        with self._get_conn() as conn:
+            return {row[0] for row in conn.execute("SELECT folder_name FROM posts")}
+
     def get_next_pending_post(self):
         """
         Get the next post that hasn't been fully published across all platforms.
         Returns (post_id, folder_name, video_path, reel_caption, story_caption, duration) or None.
         """
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        # Get posts that don't have all 4 platforms published
-        # Platforms: ig_reel, ig_story, fb_reel, fb_feed
-        cursor.execute("""
-            SELECT p.id, p.folder_name, p.video_path, p.reel_caption, p.story_caption, p.duration
-            FROM posts p
-            WHERE NOT EXISTS (
-                SELECT 1 FROM post_status ps 
-                WHERE ps.post_id = p.id 
-                AND ps.platform IN ('ig_reel', 'ig_story', 'fb_reel', 'fb_feed')
-                AND ps.status = 'PUBLISHED'
-                GROUP BY ps.post_id
-                HAVING COUNT(*) >= 4
-            )
-            ORDER BY p.created_at ASC
-        """)
-        results = cursor.fetchall()
-        conn.close()
-
-        # Find first post where video file still exists
-        for result in results:
-            post_id, folder_name, video_path, reel_caption, story_caption, duration = result
-            if Path(video_path).exists():
-                return result
-            else:
-                logger.warning(f"Skipping {folder_name} — video file missing: {video_path}")
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
+
+            # Get posts that don't have all 4 platforms published
+            # Platforms: ig_reel, ig_story, fb_reel, fb_feed
+            cursor.execute("""
+                SELECT p.id, p.folder_name, p.video_path, p.reel_caption, p.story_caption, p.duration
+                FROM posts p
+                LEFT JOIN post_status ps
+                    ON ps.post_id = p.id
+                    AND ps.status = 'PUBLISHED'
+                    AND ps.platform IN ('ig_reel', 'ig_story', 'fb_reel', 'fb_feed')
+                GROUP BY p.id
+                HAVING COUNT(ps.platform) < 4
+                ORDER BY p.created_at ASC
+            """)
+
+            # Find first post where video file still exists. Rows are pulled
+            # lazily so the scan stops at the first usable post.
+            for result in cursor:
+                post_id, folder_name, video_path, reel_caption, story_caption, duration = result
+                if _file_exists(video_path):
+                    return result
+                else:
+                    logger.warning("Skipping %s — video file missing: %s", folder_name, video_path)
 
         return None
 
     def get_published_platforms(self, post_id: int) -> set:
         """Get the set of platforms already published for a post."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT platform FROM post_status WHERE post_id = ? AND status = 'PUBLISHED'",
-            (post_id,),
-        )
-        platforms = {row[0] for row in cursor.fetchall()}
-        conn.close()
-        return platforms
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT platform FROM post_status WHERE post_id = ? AND status = 'PUBLISHED'",
+                (post_id,),
+            )
+            return {row[0] for row in cursor.fetchall()}
 
     def update_status(self, post_id: int, platform: str, status: str, error_message: str = None):
         """Update or insert post status for a platform."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
         published_at = datetime.now().isoformat() if status == "PUBLISHED" else None
-        cursor.execute(
-            """INSERT OR REPLACE INTO post_status (post_id, platform, status, published_at, error_message)
-               VALUES (?, ?, ?, ?, ?)""",
-            (post_id, platform, status, published_at, error_message),
-        )
-        conn.commit()
-        conn.close()
+        with self._get_conn() as conn:
+            conn.execute(
+                """INSERT INTO post_status (post_id, platform, status, published_at, error_message)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(post_id, platform) DO UPDATE SET
+                       status = excluded.status,
+                       published_at = excluded.published_at,
+                       error_message = excluded.error_message""",
+                (post_id, platform, status, published_at, error_message),
+            )
 
     def remove_missing_posts(self):
         """Remove posts from DB where video file no longer exists."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, folder_name, video_path FROM posts")
-        posts = cursor.fetchall()
-
-        removed = 0
-        for post_id, folder_name, video_path in posts:
-            if not Path(video_path).exists():
-                cursor.execute("DELETE FROM post_status WHERE post_id = ?", (post_id,))
-                cursor.execute("DELETE FROM posts WHERE id = ?", (post_id,))
-                logger.info(f"Removed stale DB entry: {folder_name}")
-                removed += 1
-
-        conn.commit()
-        conn.close()
-        return removed
+        with self._get_conn() as conn:
+            posts = conn.execute("SELECT id, folder_name, video_path FROM posts").fetchall()
 
-    def update_scheduler_state(self, last_posted_folder: str):
-        """Update scheduler state. Resets posts_today counter if new day."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
+        try:
+            stale = [(post_id, folder_name) for post_id, folder_name, video_path in posts
+                     if not _file_exists(video_path)]
+        except OSError as e:
+            # Can't tell missing from unreachable; deleting would drop the
+            # PUBLISHED rows and re-post the video, so remove nothing
+            logger.warning("Skipping stale-entry cleanup: %s", e)
+            return 0
+        if not stale:
+            return 0
 
-        today = date.today().isoformat()
+        ids = [(post_id,) for post_id, _ in stale]
+        with self.transaction() as conn:
+            # post_status rows are deleted explicitly as well, since databases
+            # created before ON DELETE CASCADE was added don't cascade.
+            conn.executemany("DELETE FROM post_status WHERE post_id = ?", ids)
+            conn.executemany("DELETE FROM posts WHERE id = ?", ids)
 
-        # Check if it's a new day — reset counter
-        cursor.execute("SELECT today_date FROM scheduler_state WHERE id = 1")
-        row = cursor.fetchone()
-        current_date = row[0] if row else None
+        for _, folder_name in stale:
+            logger.info("Removed stale DB entry: %s", folder_name)
+        return len(stale)
 
-        if current_date != today:
-            # New day — reset counter
-            cursor.execute(
-                """UPDATE scheduler_state 
-                   SET last_run = ?, last_posted_folder = ?, posts_today = 1, today_date = ?
-                   WHERE id = 1""",
-                (datetime.now().isoformat(), last_posted_folder, today),
+    def get_gcs_blob(self, post_id: int):
+        """Get the GCS object path a post's video was uploaded to, or None."""
+        with self._get_conn() as conn:
+            row = conn.execute("SELECT gcs_blob FROM posts WHERE id = ?", (post_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_gcs_blob(self, post_id: int, blob_path: str):
+        """Record the GCS object path a post's video was uploaded to."""
+        with self._get_conn() as conn:
+            conn.execute("UPDATE posts SET gcs_blob = ? WHERE id = ?", (blob_path, post_id))
+
+    def get_state(self, key: str):
+        """Get a service_state value, or None if unset."""
+        with self._get_conn() as conn:
+            row = conn.execute("SELECT value FROM service_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str):
+        """Set a service_state value."""
+        with self._get_conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO service_state (key, value) VALUES (?, ?)",
+                (key, value),
             )
-        else:
-            cursor.execute(
+
+    def update_scheduler_state(self, last_posted_folder: str):
+        """Update scheduler state. Resets posts_today counter if new day."""
+        today = date.today().isoformat()
+
+        with self._get_conn() as conn:
+            conn.execute(
                 """UPDATE scheduler_state 
-                   SET last_run = ?, last_posted_folder = ?, posts_today = posts_today + 1
+                   SET last_run = ?,
+                       last_posted_folder = ?,
+                       posts_today = CASE WHEN today_date = ? THEN posts_today + 1 ELSE 1 END,
+                       today_date = ?
                    WHERE id = 1""",
-                (datetime.now().isoformat(), last_posted_folder),
+                (datetime.now().isoformat(), last_posted_folder, today, today),
             )
 
-        conn.commit()
-        conn.close()
-
     def get_posts_today(self) -> int:
         """Get number of posts made today."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
         today = date.today().isoformat()
-        cursor.execute(
-            "SELECT posts_today FROM scheduler_state WHERE id = 1 AND today_date = ?",
-            (today,),
-        )
-        row = cursor.fetchone()
-        conn.close()
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT posts_today FROM scheduler_state WHERE id = 1 AND today_date = ?",
+                (today,),
+            )
+            row = cursor.fetchone()
         return row[0] if row else 0
@@ -5,84 +5,275 @@ Also handles GCS upload and signed URL generation.
 
 import os
 import json
+import hashlib
 import logging
+import threading
 import time
+import random
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
 from datetime import timedelta
+from functools import lru_cache
 from typing import Optional
 
-from .config import Config
+from .config import Config, SERVICE_DIR
 
 logger = logging.getLogger(__name__)
 
+# Page tokens are long-lived; reuse one across restarts instead of fetching
+# it on every start. Refetched on expiry or when Meta rejects it.
+PAGE_TOKEN_CACHE = SERVICE_DIR / ".page_token.json"
+PAGE_TOKEN_MAX_AGE = timedelta(days=60).total_seconds()
+
+
+@lru_cache(maxsize=1)
+def _gcs_modules():
+    """Import the Google Cloud libraries once, on first use (GCS is optional)."""
+    from google.oauth2 import service_account
+    from google.cloud import storage
+
+    return service_account, storage
+
 
 class MetaAPI:
     """Handles all Meta Graph API interactions and GCS uploads."""
 
     API_VERSION = "v21.0"
     BASE_URL = f"https://graph.facebook.com/{API_VERSION}"
+    REQUEST_TIMEOUT = 30  # seconds, default for every Graph API call
+    # For calls where Meta fetches or publishes the video before responding;
+    # a read timeout there is not retried and may hide an accepted post
+    MEDIA_REQUEST_TIMEOUT = 300
+    GCS_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MiB (a multiple of 256 KiB, as GCS requires)
+    GCS_SINGLE_SHOT_MAX = 10 * 1024 * 1024  # smaller files upload in one request
+    GCS_UPLOAD_WORKERS = 4
+    GCS_UPLOAD_TIMEOUT = 600  # seconds
+    POLL_INITIAL_DELAY = 1.0  # container status polling: 1s, 2s, 4s, 8s, 15s...
+    POLL_MAX_DELAY = 15.0
 
     def __init__(self):
         self.access_token = Config.META_ACCESS_TOKEN
         self.ig_account_id = Config.IG_ACCOUNT_ID
         self.fb_page_id = Config.FB_PAGE_ID
         self.page_access_token = None
+        self.gcs_client = None
         self.gcs_bucket = None
+        self.session = self._create_session()
+        # The token is fixed for the life of the instance, so check it once
+        self._token_valid = self._check_token()
+        self._page_token_cached = False
+        self._page_token_fallback = False
+        self._refetched_this_run = False
+        self._token_lock = threading.Lock()
 
         self._init_gcs()
         self._get_page_access_token()
 
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """HTTP session with keep-alive connection pooling and retries.
+
+        urllib3 only retries idempotent methods by default, so POSTs that
+        create or publish media are never sent twice.
+        """
+        session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
+        session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=retry),
+        )
+        return session
+
+    def _request(self, method: str, url: str, auth: Optional[str] = None,
+                 **kwargs) -> requests.Response:
+        """
+        Send a request on the shared session with a default timeout.
+
+        With auth="params" the current Page Access Token is sent as the
+        access_token query parameter, with auth="header" as an OAuth
+        Authorization header. The token is filled in on every send, so a
+        refreshed token is picked up by later requests (e.g. status polls).
+        If Meta rejects the token that was sent, the request is retried once
+        with a newer one.
+        """
+        kwargs.setdefault("timeout", self.REQUEST_TIMEOUT)
+        sent = self._current_token()
+        response = self.session.request(method, url, **self._with_token(kwargs, auth, sent))
+
+        if auth and self._is_auth_error(response):
+            fresh = self._refresh_rejected_token(sent)
+            if fresh and fresh != sent:
+                response = self.session.request(
+                    method, url, **self._with_token(kwargs, auth, fresh)
+                )
+
+        return response
+
+    def _current_token(self) -> Optional[str]:
+        """Token Graph API calls authenticate with."""
+        return self.page_access_token or self.access_token
+
+    @staticmethod
+    def _with_token(kwargs: dict, auth: Optional[str], token: Optional[str]) -> dict:
+        """Copy of request kwargs carrying `token` as `auth` specifies."""
+        if auth == "params":
+            return {**kwargs, "params": {**(kwargs.get("params") or {}), "access_token": token}}
+        if auth == "header":
+            headers = {**(kwargs.get("headers") or {}), "Authorization": f"OAuth {token}"}
+            return {**kwargs, "headers": headers}
+        return kwargs
+
+    def _refresh_rejected_token(self, rejected: Optional[str]) -> Optional[str]:
+        """
+        Return a token to retry with after `rejected` was refused.
+
+        If another thread has already replaced it, that token is used.
+        Otherwise the page token is refetched (dropping the disk cache if
+        that is where it came from), at most once per run so a token Meta
+        keeps rejecting doesn't trigger a refetch on every request.
+        """
+        with self._token_lock:
+            if self._current_token() == rejected and not self._refetched_this_run:
+                logger.warning("Page Access Token rejected — refetching")
+                self._refetched_this_run = True
+                if self._page_token_cached:
+                    PAGE_TOKEN_CACHE.unlink(missing_ok=True)
+                self._get_page_access_token(use_cache=False)
+            return self._current_token()
+
+    def begin_run(self):
+        """
+        Prepare for a posting run: retry the page token fetch if the last one
+        failed, and allow one refetch on rejection again.
+        """
+        with self._token_lock:
+            self._refetched_this_run = False
+            if self._page_token_fallback:
+                logger.info("Last Page Access Token fetch failed — retrying")
+                self._get_page_access_token(use_cache=False)
+
+    @staticmethod
+    def _is_auth_error(response: requests.Response) -> bool:
+        """True for HTTP 401 or a Graph API OAuthException (code 190)."""
+        if response.status_code == 401:
+            return True
+        if response.status_code != 400:
+            return False
+        try:
+            return response.json().get("error", {}).get("code") == 190
+        except ValueError:
+            return False
+
     def _init_gcs(self):
         """Initialize Google Cloud Storage client."""
         if not Config.GCS_ENABLED:
             logger.info("GCS is disabled")
             return
         try:
-            creds_json = Config.GCS_CREDENTIALS_JSON
+            creds_dict = Config.GCS_CREDENTIALS
             bucket_name = Config.GCS_BUCKET_NAME
-            if creds_json and bucket_name:
-                creds_dict = json.loads(creds_json)
-                from google.oauth2 import service_account
-                from google.cloud import storage
+            if creds_dict is None and Config.GCS_CREDENTIALS_JSON:
+                logger.error("Failed to init GCS: GCS_CREDENTIALS_JSON is not valid JSON")
+            elif creds_dict and bucket_name:
+                service_account, storage = _gcs_modules()
 
                 credentials = service_account.Credentials.from_service_account_info(
                     creds_dict
                 )
-                client = storage.Client(
+                # One client for the instance's lifetime, so its HTTP
+                # connections are reused across uploads
+                self.gcs_client = storage.Client(
                     credentials=credentials, project=creds_dict.get("project_id")
                 )
-                self.gcs_bucket = client.bucket(bucket_name)
-                logger.info(f"GCS initialized: bucket={bucket_name}")
+                self.gcs_bucket = self.gcs_client.bucket(bucket_name)
+                logger.info("GCS initialized: bucket=%s", bucket_name)
         except Exception as e:
-            logger.error(f"Failed to init GCS: {e}")
+            logger.error("Failed to init GCS: %s", e)
+
+    def _token_fingerprint(self) -> str:
+        """Identify the page/user token pair a cached page token belongs to."""
+        key = f"{self.fb_page_id}:{self.access_token}".encode("utf-8")
+        return hashlib.sha256(key).hexdigest()
+
+    def _load_cached_page_token(self) -> Optional[str]:
+        """Return the cached Page Access Token if present, fresh and matching."""
+        try:
+            data = orjson.loads(PAGE_TOKEN_CACHE.read_bytes())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict):
+            return None
+        if data.get("fingerprint") != self._token_fingerprint():
+            return None
+        if time.time() - data.get("fetched_at", 0) > PAGE_TOKEN_MAX_AGE:
+            return None
+        return data.get("token")
+
+    def _save_cached_page_token(self, token: str):
+        """Persist the Page Access Token (owner-only permissions)."""
+        payload = {
+            "token": token,
+            "fetched_at": time.time(),
+            "fingerprint": self._token_fingerprint(),
+        }
+        try:
+            tmp_path = PAGE_TOKEN_CACHE.with_suffix(".tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, PAGE_TOKEN_CACHE)
+        except OSError as e:
+            logger.warning("Could not cache Page Access Token: %s", e)
 
-    def _get_page_access_token(self):
-        """Get Page Access Token from User Access Token."""
+    def _get_page_access_token(self, use_cache: bool = True):
+        """Get Page Access Token from User Access Token (or the disk cache)."""
         if not self.access_token or not self.fb_page_id:
             logger.warning("Missing access token or FB page ID")
             return
 
+        if use_cache:
+            cached = self._load_cached_page_token()
+            if cached:
+                self.page_access_token = cached
+                self._page_token_cached = True
+                logger.info("Using cached Page Access Token")
+                return
+
+        # Set only when the fetch fails and the user token stands in for the
+        # page token; begin_run() retries the fetch while it is set
+        self._page_token_fallback = True
+        self._page_token_cached = False
         try:
             url = f"{self.BASE_URL}/{self.fb_page_id}"
             params = {"fields": "access_token", "access_token": self.access_token}
-            response = requests.get(url, params=params)
+            response = self._request("GET", url, params=params)
             response.raise_for_status()
             data = response.json()
-            self.page_access_token = data.get("access_token")
-            if self.page_access_token:
+            page_token = data.get("access_token")
+            if page_token:
+                self.page_access_token = page_token
+                self._page_token_fallback = False
                 logger.info("Got Page Access Token successfully")
+                self._save_cached_page_token(page_token)
             else:
                 logger.warning("No page access token in response, using user token")
                 self.page_access_token = self.access_token
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Page Access Token: {e}")
+        except requests.exceptions.RequestException as e:
+            logger.error("Failed to get Page Access Token: %s", e)
             if e.response:
-                logger.error(f"Response: {e.response.text}")
+                logger.error("Response: %s", e.response.text)
             self.page_access_token = self.access_token
 
     # ── GCS Helpers ──────────────────────────────────────────────
 
+    @staticmethod
+    def gcs_blob_path(video_path: Path, folder_name: str) -> str:
+        """Object path a folder's video is uploaded to."""
+        return f"{Config.GCS_FOLDER_PREFIX}/{folder_name}/{video_path.name}"
+
     def upload_to_gcs(self, video_path: Path, folder_name: str) -> Optional[str]:
         """Upload video to GCS and return a signed URL (7-day expiry)."""
         if not self.gcs_bucket:
@@ -90,145 +281,211 @@ class MetaAPI:
             return None
 
         try:
-            blob_path = f"{Config.GCS_FOLDER_PREFIX}/{folder_name}/{video_path.name}"
+            blob_path = self.gcs_blob_path(video_path, folder_name)
             blob = self.gcs_bucket.blob(blob_path)
-            blob.upload_from_filename(str(video_path))
-            signed_url = blob.generate_signed_url(
-                expiration=timedelta(days=7), method="GET", version="v4"
-            )
-            logger.info(f"Uploaded to GCS: {blob_path}")
+            self._upload_blob(blob, video_path)
+            signed_url = self._sign_blob_url(blob)
+            logger.info("Uploaded to GCS: %s", blob_path)
             return signed_url
         except Exception as e:
-            logger.error(f"GCS upload failed: {e}")
+            logger.error("GCS upload failed: %s", e)
+            return None
+
+    def get_existing_gcs_url(self, blob_path: str, video_path: Path) -> Optional[str]:
+        """
+        Return a fresh signed URL for an already-uploaded video, or None if
+        the object is gone or no longer matches the local file's size.
+        """
+        if not self.gcs_bucket:
             return None
 
+        try:
+            blob = self.gcs_bucket.get_blob(blob_path)  # None if missing
+            if blob is None or blob.size != video_path.stat().st_size:
+                return None
+            return self._sign_blob_url(blob)
+        except Exception as e:
+            logger.warning("Could not reuse GCS object %s: %s", blob_path, e)
+            return None
+
+    @staticmethod
+    def _sign_blob_url(blob) -> str:
+        """Sign a GET URL for a blob (computed locally, no request)."""
+        return blob.generate_signed_url(
+            expiration=timedelta(days=7), method="GET", version="v4"
+        )
+
+    def _upload_blob(self, blob, video_path: Path):
+        """
+        Upload a file to GCS.
+
+        Small files go up in a single request. Larger files use parallel
+        multipart chunks when available, else a resumable upload in
+        GCS_CHUNK_SIZE pieces so memory stays bounded.
+        """
+        if video_path.stat().st_size < self.GCS_SINGLE_SHOT_MAX:
+            blob.chunk_size = None  # one request, no resumable session
+            blob.upload_from_filename(str(video_path), timeout=self.GCS_UPLOAD_TIMEOUT)
+            return
+
+        try:
+            from google.cloud.storage import transfer_manager
+            upload_concurrently = transfer_manager.upload_chunks_concurrently
+        except (ImportError, AttributeError):
+            # google-cloud-storage too old for concurrent chunk uploads
+            blob.chunk_size = self.GCS_CHUNK_SIZE
+            blob.upload_from_filename(str(video_path), timeout=self.GCS_UPLOAD_TIMEOUT)
+            return
+
+        upload_concurrently(
+            str(video_path),
+            blob,
+            chunk_size=self.GCS_CHUNK_SIZE,
+            max_workers=self.GCS_UPLOAD_WORKERS,
+            worker_type=transfer_manager.THREAD,
+        )
+
     # ── Instagram ────────────────────────────────────────────────
 
     def create_ig_reel_container(self, video_url: str, caption: str) -> Optional[str]:
         """Create an Instagram Reel container."""
-        token = self.page_access_token or self.access_token
         url = f"{self.BASE_URL}/{self.ig_account_id}/media"
         params = {
             "media_type": "REELS",
             "video_url": video_url,
             "caption": caption,
-            "access_token": token,
         }
         try:
-            response = requests.post(url, params=params)
+            response = self._request("POST", url, auth="params", params=params)
             response.raise_for_status()
             container_id = response.json().get("id")
-            logger.info(f"IG Reel container created: {container_id}")
+            logger.info("IG Reel container created: %s", container_id)
             return container_id
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to create IG Reel container: {e}")
+        except requests.exceptions.RequestException as e:
+            logger.error("Failed to create IG Reel container: %s", e)
             if e.response:
-                logger.error(f"Response: {e.response.text}")
+                logger.error("Response: %s", e.response.text)
             return None
 
     def create_ig_story_container(
         self, video_url: str, caption: str = ""
     ) -> Optional[str]:
         """Create an Instagram Story container. Caption = title only."""
-        token = self.page_access_token or self.access_token
         url = f"{self.BASE_URL}/{self.ig_account_id}/media"
         params = {
             "media_type": "STORIES",
             "video_url": video_url,
-            "access_token": token,
         }
         # Instagram Stories API doesn't support caption field directly, 
         # but we pass it for logging and potential future use
         if caption:
-            logger.info(f"Story title: {caption[:80]}")
+            logger.info("Story title: %s", caption[:80])
         try:
-            response = requests.post(url, params=params)
+            response = self._request("POST", url, auth="params", params=params)
             response.raise_for_status()
             container_id = response.json().get("id")
-            logger.info(f"IG Story container created: {container_id}")
+            logger.info("IG Story container created: %s", container_id)
             return container_id
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to create IG Story container: {e}")
+        except requests.exceptions.RequestException as e:
+            logger.error("Failed to create IG Story container: %s", e)
             if e.response:
-                logger.error(f"Response: {e.response.text}")
+                logger.error("Response: %s", e.response.text)
             return None
 
     def check_container_status(
-        self, container_id: str, max_attempts: int = 30
+        self, container_id: str, timeout: float = 300.0
     ) -> str:
-        """Poll container status until FINISHED, ERROR, or TIMEOUT."""
-        token = self.page_access_token or self.access_token
+        """
+        Poll container status until FINISHED, ERROR, or TIMEOUT.
+
+        Polls quickly at first and backs off exponentially (with jitter) up to
+        POLL_MAX_DELAY between attempts, giving up once `timeout` seconds of
+        wall-clock time elapse.
+        """
         url = f"{self.BASE_URL}/{container_id}"
-        params = {"fields": "status_code,status", "access_token": token}
-        for attempt in range(max_attempts):
+        params = {"fields": "status_code,status"}
+        deadline = time.monotonic() + timeout
+        delay = self.POLL_INITIAL_DELAY
+        attempt = 0
+        while True:
+            attempt += 1
             try:
-                response = requests.get(url, params=params)
-                data = response.json()
+                response = self._request("GET", url, auth="params", params=params)
+                data = orjson.loads(response.content)
                 status = data.get("status_code")
                 logger.info(
-                    f"Container {container_id} status: {status} (attempt {attempt+1}/{max_attempts})"
+                    "Container %s status: %s (attempt %d)", container_id, status, attempt
                 )
                 if status == "FINISHED":
                     return "FINISHED"
                 elif status == "ERROR":
-                    logger.error(f"Container error: {data}")
+                    logger.error("Container error: %s", data)
                     return "ERROR"
             except Exception as e:
-                logger.error(f"Error checking container status: {e}")
-            time.sleep(10)
-        return "TIMEOUT"
+                logger.error("Error checking container status: %s", e)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return "TIMEOUT"
+            time.sleep(min(delay + random.uniform(0, delay * 0.2), remaining))
+            delay = min(delay * 2, self.POLL_MAX_DELAY)
 
     def publish_ig_media(self, container_id: str) -> bool:
         """Publish a prepared Instagram media container."""
-        token = self.page_access_token or self.access_token
         url = f"{self.BASE_URL}/{self.ig_account_id}/media_publish"
-        params = {"creation_id": container_id, "access_token": token}
+        params = {"creation_id": container_id}
         try:
-            response = requests.post(url, params=params)
+            response = self._request(
+                "POST", url, auth="params", params=params,
+                timeout=self.MEDIA_REQUEST_TIMEOUT,
+            )
             if response.status_code != 200:
-                logger.error(f"Failed to publish IG media: HTTP {response.status_code}")
-                logger.error(f"Response body: {response.text}")
+                logger.error("Failed to publish IG media: HTTP %s", response.status_code)
+                logger.error("Response body: %s", response.text)
                 return False
-            logger.info(f"IG media published: {response.json()}")
+            logger.info("IG media published: %s", response.json())
             return True
         except Exception as e:
-            logger.error(f"Failed to publish IG media: {e}")
+            logger.error("Failed to publish IG media: %s", e)
             return False
 
     # ── Facebook ─────────────────────────────────────────────────
 
     def create_fb_reel(self, video_url: str, caption: str) -> bool:
         """Create and publish a Facebook Reel (3-step process)."""
-        token = self.page_access_token or self.access_token
-        if not token:
+        if not self._current_token():
             logger.error("No access token available for FB Reel")
             return False
 
         # Step 1: Initialize upload
         url = f"{self.BASE_URL}/{self.fb_page_id}/video_reels"
-        params = {"upload_phase": "START", "access_token": token}
+        params = {"upload_phase": "START"}
         try:
-            response = requests.post(url, params=params)
+            response = self._request("POST", url, auth="params", params=params)
             response.raise_for_status()
             video_id = response.json().get("video_id")
-            logger.info(f"FB Reel upload started: {video_id}")
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to start FB Reel: {e}")
+            logger.info("FB Reel upload started: %s", video_id)
+        except requests.exceptions.RequestException as e:
+            logger.error("Failed to start FB Reel: %s", e)
             if e.response:
-                logger.error(f"Response: {e.response.text}")
+                logger.error("Response: %s", e.response.text)
             return False
 
         # Step 2: Upload video
         upload_url = f"https://rupload.facebook.com/video-upload/{self.API_VERSION}/{video_id}"
-        headers = {"Authorization": f"OAuth {token}", "file_url": video_url}
+        headers = {"file_url": video_url}
         try:
-            response = requests.post(upload_url, headers=headers)
+            # Meta fetches file_url server-side before responding
+            response = self._request(
+                "POST", upload_url, auth="header", headers=headers,
+                timeout=self.MEDIA_REQUEST_TIMEOUT,
+            )
             response.raise_for_status()
             logger.info("FB Reel video uploaded successfully")
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to upload FB Reel video: {e}")
+        except requests.exceptions.RequestException as e:
+            logger.error("Failed to upload FB Reel video: %s", e)
             if e.response:
-                logger.error(f"Response: {e.response.text}")
+                logger.error("Response: %s", e.response.text)
             return False
 
         # Step 3: Publish
@@ -237,23 +494,21 @@ class MetaAPI:
             "video_id": video_id,
             "video_state": "PUBLISHED",
             "description": caption,
-            "access_token": token,
         }
         try:
-            response = requests.post(url, params=params)
+            response = self._request("POST", url, auth="params", params=params)
             response.raise_for_status()
             logger.info("FB Reel published successfully")
             return True
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to publish FB Reel: {e}")
+        except requests.exceptions.RequestException as e:
+            logger.error("Failed to publish FB Reel: %s", e)
             if e.response:
-                logger.error(f"Response: {e.response.text}")
+                logger.error("Response: %s", e.response.text)
             return False
 
     def create_fb_feed_video(self, video_url: str, caption: str) -> bool:
         """Post a video to the Facebook Page feed."""
-        token = self.page_access_token or self.access_token
-        if not token:
+        if not self._current_token():
             logger.error("No access token available for FB Feed")
             return False
 
@@ -261,25 +516,33 @@ class MetaAPI:
         params = {
             "file_url": video_url,
             "description": caption,
-            "access_token": token,
         }
         try:
-            response = requests.post(url, params=params)
+            # Meta fetches file_url server-side before responding
+            response = self._request(
+                "POST", url, auth="params", params=params,
+                timeout=self.MEDIA_REQUEST_TIMEOUT,
+            )
             response.raise_for_status()
-            logger.info(f"FB Feed video published: {response.json()}")
+            logger.info("FB Feed video published: %s", response.json())
             return True
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to create FB Feed video: {e}")
+        except requests.exceptions.RequestException as e:
+            logger.error("Failed to create FB Feed video: %s", e)
             if e.response:
-                logger.error(f"Response: {e.response.text}")
+                logger.error("Response: %s", e.response.text)
             return False
 
     def is_token_valid(self) -> bool:
         """Check if the Meta access token appears valid."""
-        if not self.access_token:
+        return self._token_valid
+
+    def _check_token(self) -> bool:
+        """Static sanity check of the configured user access token."""
+        token = self.access_token
+        if not token:
             return False
-        if "YOUR_" in self.access_token.upper():
+        if "YOUR_" in token.upper():
             return False
-        if len(self.access_token) < 50:
+        if len(token) < 50:
             return False
         return True
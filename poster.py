@@ -3,10 +3,17 @@ Main posting orchestrator.
 Syncs input folders, builds captions, and posts to all platforms.
 """
 
+import os
+import re
+import shutil
+import struct
 import subprocess
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 from .config import Config
 from .database import Database
@@ -15,6 +22,76 @@ from .content_parser import parse_content_folder
 
 logger = logging.getLogger(__name__)
 
+PLATFORMS = ("ig_reel", "ig_story", "fb_reel", "fb_feed")
+
+_MP4_RE = re.compile(r"\.mp4$", re.IGNORECASE)
+
+# Folder probing (file I/O + ffprobe subprocess) releases the GIL while waiting
+PROBE_WORKERS = 8
+
+
+def _read_mp4_duration(video_path: Path) -> Optional[float]:
+    """
+    Read duration from the MP4 movie header (moov/mvhd box) without decoding.
+    Returns None if the file has no usable mvhd.
+    """
+    with open(video_path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        moov = _find_mp4_box(f, b"moov", 0, file_size)
+        if moov is None:
+            return None
+        mvhd = _find_mp4_box(f, b"mvhd", *moov)
+        if mvhd is None:
+            return None
+
+        f.seek(mvhd[0])
+        version = f.read(4)[0]  # version (1 byte) + flags (3 bytes)
+        if version == 1:
+            header = f.read(28)  # creation u64, modification u64, timescale u32, duration u64
+            timescale, duration = struct.unpack(">IQ", header[16:28])
+            unknown = 0xFFFFFFFFFFFFFFFF
+        else:
+            header = f.read(16)  # creation u32, modification u32, timescale u32, duration u32
+            timescale, duration = struct.unpack(">II", header[8:16])
+            unknown = 0xFFFFFFFF
+    if not timescale or duration in (0, unknown):
+        return None
+    return duration / timescale
+
+
+def _find_mp4_box(f, box_type: bytes, start: int, end: int) -> Optional[Tuple[int, int]]:
+    """Find a box among the siblings in [start, end); return its (payload_start, end)."""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        size, kind = struct.unpack(">I4s", header)
+        payload = pos + 8
+        if size == 1:  # 64-bit size follows the type
+            largesize = f.read(8)
+            if len(largesize) < 8:
+                return None
+            size = struct.unpack(">Q", largesize)[0]
+            payload += 8
+        elif size == 0:  # box extends to the end of its parent
+            size = end - pos
+        if size < payload - pos:
+            return None  # corrupt
+        if kind == box_type:
+            return payload, min(pos + size, end)
+        pos += size
+    return None
+
+
+@lru_cache(maxsize=1)
+def _moviepy_clip_class():
+    """Import moviepy (slow: numpy, imageio, PIL) only once, on first use."""
+    from moviepy import VideoFileClip
+
+    return VideoFileClip
+
 
 class Poster:
     """Orchestrates syncing, caption building, and multi-platform posting."""
@@ -29,27 +106,36 @@ class Poster:
         self.processed_folder.mkdir(parents=True, exist_ok=True)
 
     def get_video_duration(self, video_path: Path) -> float:
-        """Get video duration using ffprobe (fast) or fallback."""
+        """Probe video duration using ffprobe (fast) or fallback."""
         try:
             result = subprocess.run(
                 [
                     "ffprobe", "-v", "error",
                     "-show_entries", "format=duration",
-                    "-of", "default=noprint_wrappers=1:nokey=1",
+                    "-of", "csv=p=0",
                     str(video_path),
                 ],
-                capture_output=True,
-                text=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
                 timeout=10,
             )
-            if result.returncode == 0 and result.stdout.strip():
-                return float(result.stdout.strip())
+            # float() parses the raw bytes (surrounding whitespace is allowed)
+            if result.returncode == 0 and result.stdout:
+                return float(result.stdout)
         except Exception as e:
             logger.debug(f"ffprobe failed: {e}")
 
-        # Fallback to moviepy
+        # Fallback: read the duration from the MP4 header (no subprocess)
+        try:
+            duration = _read_mp4_duration(video_path)
+            if duration:
+                return duration
+        except Exception as e:
+            logger.debug(f"MP4 header parse failed: {e}")
+
+        # Last resort: moviepy
         try:
-            from moviepy import VideoFileClip
+            VideoFileClip = _moviepy_clip_class()
             with VideoFileClip(str(video_path)) as clip:
                 return clip.duration
         except Exception as e:
@@ -57,43 +143,75 @@ class Poster:
 
         return 0.0
 
+    def _probe_folder(self, folder: Path):
+        """Collect (folder, video_path, content, duration) for a new folder."""
+        video_path = self.find_video_file(folder)
+        if not video_path:
+            return folder, None, None, None
+        return folder, video_path, parse_content_folder(folder), self.get_video_duration(video_path)
+
+    def _probe_folders(self, folders: List[Path]):
+        """Run _probe_folder over folders concurrently; results keep folder order."""
+        if not folders:
+            return []
+        workers = min(PROBE_WORKERS, len(folders))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self._probe_folder, folders))
+
     def find_video_file(self, folder: Path) -> Optional[Path]:
-        """Find the video file in a content folder."""
-        for pattern in ["final_video*.mp4", "*.mp4"]:
-            videos = list(folder.glob(pattern))
-            if videos:
-                return videos[0]
-        return None
+        """Find the video file in a content folder (final_video*.mp4 preferred, .mp4/.MP4)."""
+        fallback = None
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if not _MP4_RE.search(entry.name) or not entry.is_file():
+                        continue
+                    if entry.name.startswith("final_video"):
+                        return Path(entry.path)
+                    if fallback is None:
+                        fallback = Path(entry.path)
+        except OSError as e:
+            # Folder vanished or is unreadable; skip it rather than the sync
+            logger.warning(f"Cannot read folder {folder.name}: {e}")
+            return None
+        return fallback
 
     def sync_input_folder(self):
         """Scan input folder and add new posts to database."""
-        if not self.input_folder.exists():
+        try:
+            input_mtime = str(self.input_folder.stat().st_mtime_ns)
+        except FileNotFoundError:
             logger.error(f"Input folder not found: {self.input_folder}")
             return
 
+        # Post folders being added or removed bumps the input folder's mtime;
+        # if it hasn't moved since the last complete sync there is nothing to do
+        if input_mtime == self.db.get_state("last_input_mtime"):
+            logger.info("Sync skipped: input folder unchanged")
+            return
+
         # Clean stale entries first
         removed = self.db.remove_missing_posts()
         if removed > 0:
             logger.info(f"Cleaned up {removed} stale database entries")
 
-        folders = sorted([f for f in self.input_folder.iterdir() if f.is_dir()])
+        # DirEntry.is_dir() uses the type from readdir, so plain folders need
+        # no stat; symlinked folders are still followed as before
+        with os.scandir(self.input_folder) as it:
+            folders = sorted((Path(e.path) for e in it if e.is_dir()), key=lambda p: p.name)
+        known = self.db.get_all_folder_names()
+        new_folders = [f for f in folders if f.name not in known]
         new_count = 0
+        complete = True
 
-        for folder in folders:
-            # Skip if already in DB
-            if self.db.get_post_id(folder.name):
-                continue
-
-            video_path = self.find_video_file(folder)
+        # Find video, parse content and probe duration per folder in parallel;
+        # DB inserts happen here on the calling thread.
+        for folder, video_path, content, duration in self._probe_folders(new_folders):
             if not video_path:
+                # Video may still be arriving; a later sync must look again
+                complete = False
                 continue
 
-            # Parse content (JSON or TXT)
-            content = parse_content_folder(folder)
-
-            # Get duration
-            duration = self.get_video_duration(video_path)
-
             # Add to DB
             post_id = self.db.add_post(folder.name, video_path, content, duration)
             if post_id:
@@ -102,6 +220,11 @@ class Poster:
                     f"Added to DB: {folder.name} "
                     f"(title: '{content.get('title', '')[:40]}...', duration: {duration:.1f}s)"
                 )
+            else:
+                complete = False
+
+        if complete:
+            self.db.set_state("last_input_mtime", input_mtime)
 
         logger.info(f"Sync complete: {new_count} new posts added, {len(folders)} total folders")
 
@@ -132,12 +255,26 @@ class Poster:
             logger.error("Get one from: https://developers.facebook.com/tools/explorer/")
             return results
 
-        # Upload to GCS
-        video_url = self.api.upload_to_gcs(video_path, folder_name)
+        # Upload to GCS, reusing the object from an earlier partial run
+        blob_path = self.api.gcs_blob_path(video_path, folder_name)
+        video_url = None
+        if self.db.get_gcs_blob(post_id) == blob_path:
+            video_url = self.api.get_existing_gcs_url(blob_path, video_path)
+            if video_url:
+                logger.info(f"Reusing GCS upload: {blob_path}")
+        if not video_url:
+            video_url = self.api.upload_to_gcs(video_path, folder_name)
+            if video_url:
+                self.db.set_gcs_blob(post_id, blob_path)
         if not video_url:
             logger.error("GCS upload failed — cannot proceed")
             return results
 
+        # Decide what to post here; each platform's network work is queued in
+        # `jobs` as (method, *args) and run concurrently below.
+        jobs = {}
+        skipped = []  # (platform, reason), written together below
+
         # ── Instagram Reel ──
         if "ig_reel" in already_published:
             logger.info("⏭ Skipping Instagram Reel (already published)")
@@ -145,17 +282,10 @@ class Poster:
         elif Config.IG_ENABLED and Config.IG_POST_REEL and duration <= 180:
             logger.info(f"▶ Posting to Instagram Reel (duration: {duration:.1f}s)")
             logger.info(f"  Caption: {reel_caption[:100]}...")
-            container_id = self.api.create_ig_reel_container(video_url, reel_caption)
-            if container_id and self.api.check_container_status(container_id) == "FINISHED":
-                success = self.api.publish_ig_media(container_id)
-                results["ig_reel"] = success
-                self.db.update_status(post_id, "ig_reel", "PUBLISHED" if success else "FAILED")
-            else:
-                self.db.update_status(post_id, "ig_reel", "FAILED", "Container creation/processing failed")
-                results["ig_reel"] = False
+            jobs["ig_reel"] = (self._post_ig_reel, video_url, reel_caption)
         elif duration > 180:
             logger.info(f"⏭ Skipping Instagram Reel (duration {duration:.1f}s > 180s)")
-            self.db.update_status(post_id, "ig_reel", "SKIPPED", "Duration > 180s")
+            skipped.append(("ig_reel", "Duration > 180s"))
 
         # ── Instagram Story (only if <= 60s) ──
         if "ig_story" in already_published:
@@ -164,17 +294,10 @@ class Poster:
         elif Config.IG_ENABLED and Config.IG_POST_STORY and duration <= 60:
             logger.info(f"▶ Posting to Instagram Story (duration: {duration:.1f}s)")
             logger.info(f"  Story title: {story_caption[:80]}")
-            container_id = self.api.create_ig_story_container(video_url, story_caption)
-            if container_id and self.api.check_container_status(container_id) == "FINISHED":
-                success = self.api.publish_ig_media(container_id)
-                results["ig_story"] = success
-                self.db.update_status(post_id, "ig_story", "PUBLISHED" if success else "FAILED")
-            else:
-                self.db.update_status(post_id, "ig_story", "FAILED", "Container creation/processing failed")
-                results["ig_story"] = False
+            jobs["ig_story"] = (self._post_ig_story, video_url, story_caption)
         elif duration > 60:
             logger.info(f"⏭ Skipping Instagram Story (duration {duration:.1f}s > 60s)")
-            self.db.update_status(post_id, "ig_story", "SKIPPED", "Duration > 60s")
+            skipped.append(("ig_story", "Duration > 60s"))
 
         # ── Facebook Reel ──
         if "fb_reel" in already_published:
@@ -183,12 +306,10 @@ class Poster:
         elif Config.FB_ENABLED and Config.FB_POST_REEL and duration <= 180:
             logger.info(f"▶ Posting to Facebook Reel (duration: {duration:.1f}s)")
             logger.info(f"  Caption: {reel_caption[:100]}...")
-            success = self.api.create_fb_reel(video_url, reel_caption)
-            results["fb_reel"] = success
-            self.db.update_status(post_id, "fb_reel", "PUBLISHED" if success else "FAILED")
+            jobs["fb_reel"] = (self._post_fb_reel, video_url, reel_caption)
         elif duration > 180:
             logger.info(f"⏭ Skipping Facebook Reel (duration {duration:.1f}s > 180s)")
-            self.db.update_status(post_id, "fb_reel", "SKIPPED", "Duration > 180s")
+            skipped.append(("fb_reel", "Duration > 180s"))
 
         # ── Facebook Feed ──
         if "fb_feed" in already_published:
@@ -197,11 +318,55 @@ class Poster:
         elif Config.FB_ENABLED and Config.FB_POST_FEED:
             logger.info(f"▶ Posting to Facebook Feed")
             logger.info(f"  Caption: {reel_caption[:100]}...")
-            success = self.api.create_fb_feed_video(video_url, reel_caption)
-            results["fb_feed"] = success
-            self.db.update_status(post_id, "fb_feed", "PUBLISHED" if success else "FAILED")
-
-        return results
+            jobs["fb_feed"] = (self._post_fb_feed, video_url, reel_caption)
+
+        if skipped:
+            with self.db.transaction():
+                for platform, reason in skipped:
+                    self.db.update_status(post_id, platform, "SKIPPED", reason)
+
+        # Platforms are independent and network-bound: post them in parallel.
+        # Each outcome is committed as soon as it is known, so a crash mid-run
+        # never forgets a platform that was already published.
+        if jobs:
+            with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+                futures = {pool.submit(*job): platform for platform, job in jobs.items()}
+                for future in as_completed(futures):
+                    platform = futures[future]
+                    try:
+                        success, error_message = future.result()
+                    except Exception as e:
+                        logger.error(f"{platform} failed: {e}", exc_info=True)
+                        success, error_message = False, str(e)
+                    results[platform] = success
+                    self.db.update_status(
+                        post_id, platform, "PUBLISHED" if success else "FAILED", error_message
+                    )
+
+        return {p: results[p] for p in PLATFORMS if p in results}
+
+    # Per-platform posting. Each returns (success, error_message) and is run
+    # on a worker thread by post_to_platforms.
+
+    def _post_ig_reel(self, video_url: str, caption: str) -> Tuple[bool, Optional[str]]:
+        container_id = self.api.create_ig_reel_container(video_url, caption)
+        return self._publish_ig_container(container_id)
+
+    def _post_ig_story(self, video_url: str, caption: str) -> Tuple[bool, Optional[str]]:
+        container_id = self.api.create_ig_story_container(video_url, caption)
+        return self._publish_ig_container(container_id)
+
+    def _post_fb_reel(self, video_url: str, caption: str) -> Tuple[bool, Optional[str]]:
+        return self.api.create_fb_reel(video_url, caption), None
+
+    def _post_fb_feed(self, video_url: str, caption: str) -> Tuple[bool, Optional[str]]:
+        return self.api.create_fb_feed_video(video_url, caption), None
+
+    def _publish_ig_container(self, container_id: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """Wait for an IG container to finish processing, then publish it."""
+        if container_id and self.api.check_container_status(container_id) == "FINISHED":
+            return self.api.publish_ig_media(container_id), None
+        return False, "Container creation/processing failed"
 
     def run_daily_post(self):
         """Main function: sync, pick next, post, move to processed."""
@@ -211,6 +376,8 @@ class Poster:
         logger.info(f"  Posts today: {self.db.get_posts_today()}")
         logger.info("=" * 80)
 
+        self.api.begin_run()
+
         # Sync input folder
         self.sync_input_folder()
 
@@ -243,16 +410,49 @@ class Poster:
         logger.info("=" * 80)
 
         # Move to processed if all succeeded
-        if results and all(results.values()):
+        all_succeeded = bool(results) and all(results.values())
+        if not results:
+            logger.warning(f"No platforms were posted to — keeping {folder_name} in input")
+        elif not all_succeeded:
+            failed = [p for p, s in results.items() if not s]
+            logger.warning(f"Some platforms failed ({', '.join(failed)}) — keeping {folder_name} in input for retry")
+
+        # Folder move, log flush and WAL checkpoint run off the scheduler
+        # thread. Not a daemon thread, so an exiting process (e.g. --run-now)
+        # waits for a move in progress instead of cutting it short.
+        threading.Thread(
+            target=self._finalize,
+            args=(Path(video_path).parent, folder_name, all_succeeded),
+            name="finalize-post",
+        ).start()
+
+    def _finalize(self, src: Path, folder_name: str, move_to_processed: bool):
+        """Post-run cleanup: move the folder, flush log handlers, checkpoint the DB."""
+        if move_to_processed:
             try:
-                src = Path(video_path).parent
                 dst = self.processed_folder / folder_name
-                src.rename(dst)
-                logger.info(f"Moved to processed: {folder_name}")
+                # A folder of the same name was processed before; rename()
+                # would fail and shutil.move would nest it inside, so suffix it
+                suffix = 1
+                while dst.exists():
+                    dst = self.processed_folder / f"{folder_name}.{suffix}"
+                    suffix += 1
+                if dst.name != folder_name:
+                    logger.warning(f"{folder_name} already in processed — moving as {dst.name}")
+                if src.stat().st_dev == self.processed_folder.stat().st_dev:
+                    src.rename(dst)  # same filesystem: atomic
+                else:
+                    # rename() fails with EXDEV across filesystems (e.g. a
+                    # network mount); leaving the folder would re-post it
+                    shutil.move(str(src), str(dst))
+                logger.info(f"Moved to processed: {dst.name}")
             except Exception as e:
                 logger.error(f"Failed to move folder: {e}")
-        elif not results:
-            logger.warning(f"No platforms were posted to — keeping {folder_name} in input")
-        else:
-            failed = [p for p, s in results.items() if not s]
-            logger.warning(f"Some platforms failed ({', '.join(failed)}) — keeping {folder_name} in input for retry")
+
+        for handler in logging.getLogger().handlers:
+            handler.flush()
+
+        try:
+            self.db.checkpoint()
+        except Exception as e:
+            logger.warning(f"WAL checkpoint failed: {e}")
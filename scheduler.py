@@ -17,16 +17,18 @@ Usage:
 import sys
 import signal
 import logging
+import threading
 import time
-from logging.handlers import RotatingFileHandler
+from logging.handlers import MemoryHandler, RotatingFileHandler
 from pathlib import Path
+from typing import Optional
 
 from .config import Config
 from .poster import Poster
 
 
 def setup_logging():
-    """Configure rotating log files + console output."""
+    """Configure buffered rotating log files + console output."""
     log_dir = Config.LOG_DIR
     log_dir.mkdir(parents=True, exist_ok=True)
 
@@ -58,12 +60,36 @@ def setup_logging():
         logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
     )
 
-    root_logger.addHandler(file_handler)
+    # Buffer file writes; warnings and errors flush immediately, and the
+    # poster flushes after each run
+    buffered_file_handler = MemoryHandler(
+        capacity=200,
+        flushLevel=logging.WARNING,
+        target=file_handler,
+        flushOnClose=True,
+    )
+
+    root_logger.addHandler(buffered_file_handler)
     root_logger.addHandler(console_handler)
 
     return logging.getLogger(__name__)
 
 
+# One Poster for the whole process, so the sqlite connection, HTTP session,
+# GCS client and page token are reused across scheduled runs.
+_POSTER: Optional[Poster] = None
+_POSTER_LOCK = threading.Lock()
+
+
+def get_poster() -> Poster:
+    """Return the process-wide Poster, creating it on first use."""
+    global _POSTER
+    with _POSTER_LOCK:
+        if _POSTER is None:
+            _POSTER = Poster()
+        return _POSTER
+
+
 def run_scheduled_post():
     """Callback for scheduled jobs — posts one reel."""
     logger = logging.getLogger(__name__)
@@ -71,7 +97,7 @@ def run_scheduled_post():
         logger.info("━" * 60)
         logger.info("SCHEDULED JOB TRIGGERED")
         logger.info("━" * 60)
-        poster = Poster()
+        poster = get_poster()
         poster.run_daily_post()
     except Exception as e:
         logger.error(f"Scheduled job failed: {e}", exc_info=True)
@@ -101,7 +127,7 @@ def main():
     # ── --test mode ──
     if "--test" in sys.argv:
         logger.info("Running in TEST mode — sync only, no posting")
-        poster = Poster()
+        poster = get_poster()
         poster.sync_input_folder()
         logger.info("Test complete")
         return
@@ -109,7 +135,7 @@ def main():
     # ── --run-now mode ──
     if "--run-now" in sys.argv:
         logger.info("Running in RUN-NOW mode — posting immediately")
-        poster = Poster()
+        poster = get_poster()
         poster.run_daily_post()
         logger.info("Run-now complete")
         return
@@ -128,14 +154,13 @@ def main():
     ist = pytz.timezone("Asia/Kolkata")
     scheduler = BlockingScheduler(timezone=ist)
 
-    # Parse schedule times
-    h1, m1 = Config.SCHEDULE_TIME_1.split(":")
-    h2, m2 = Config.SCHEDULE_TIME_2.split(":")
+    h1, m1 = Config.SCHEDULE_HM_1
+    h2, m2 = Config.SCHEDULE_HM_2
 
     # Job 1: 6 PM IST
     scheduler.add_job(
         run_scheduled_post,
-        CronTrigger(hour=int(h1), minute=int(m1), timezone=ist),
+        CronTrigger(hour=h1, minute=m1, timezone=ist),
         id="post_6pm",
         name="Daily Post - 6 PM IST",
         misfire_grace_time=3600,  # 1 hour grace period
@@ -144,7 +169,7 @@ def main():
     # Job 2: 8 PM IST
     scheduler.add_job(
         run_scheduled_post,
-        CronTrigger(hour=int(h2), minute=int(m2), timezone=ist),
+        CronTrigger(hour=h2, minute=m2, timezone=ist),
         id="post_8pm",
         name="Daily Post - 8 PM IST",
         misfire_grace_time=3600,
@@ -181,10 +206,10 @@ def _fallback_loop(logger):
     while True:
         try:
             now = datetime.datetime.now(ist)
-            current_time = now.strftime("%H:%M")
+            current_hm = (now.hour, now.minute)
 
-            if current_time in (Config.SCHEDULE_TIME_1, Config.SCHEDULE_TIME_2):
-                today_key = f"{now.date()}_{current_time}"
+            if current_hm in (Config.SCHEDULE_HM_1, Config.SCHEDULE_HM_2):
+                today_key = (now.date(), current_hm)
                 if today_key not in posted_times:
                     posted_times.add(today_key)
                     run_scheduled_post()